@@ -8,11 +8,10 @@ import streamlit as st
 import os
 from dotenv import load_dotenv
 from pathlib import Path
-import json
+import hashlib
 
-from utils.pdf_parser import extract_text_from_pdf, get_pdf_metadata, extract_learning_objectives
-from utils.question_gen import generate_questions, grade_answer, check_api_key
-from utils.analytics import display_performance_summary, get_study_recommendation, calculate_performance_stats
+# NOTE: utils imports are deferred into the functions that use them so a
+# cold start doesn't pay for openai/PyMuPDF imports before the first render.
 
 # Load environment variables
 load_dotenv()
@@ -24,159 +23,33 @@ st.set_page_config(
     layout="wide",
 )
 
-# Custom CSS styling
-st.markdown("""
-    <style>
-    @import url('https://fonts.googleapis.com/css2?family=Roboto:wght@400;500;600;700&display=swap');
-    
-    * {
-        font-family: 'Roboto', sans-serif !important;
-    }
-    
-    html, body, [class*="css"] {
-        font-family: 'Roboto', sans-serif !important;
-    }
-    
-    /* Main title styling */
-    h1 {
-        color: #1a1a1a;
-        font-size: 2.8em;
-        margin-bottom: 10px;
-        font-weight: 700;
-    }
-    
-    /* Tab styling */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 20px;
-    }
-    
-    .stTabs [data-baseweb="tab"] {
-        font-size: 1.2em;
-        padding: 12px 24px;
-        font-weight: 500;
-    }
-    
-    /* Header styling */
-    h2 {
-        color: #2c2c2c;
-        font-size: 1.8em;
-        margin-top: 20px;
-        font-weight: 600;
-    }
-    
-    h3 {
-        color: #e67e22;
-        font-size: 1.5em;
-        font-weight: 600;
-    }
-    
-    h4 {
-        color: #333;
-        font-size: 1.3em;
-        font-weight: 600;
-    }
-    
-    /* Button styling */
-    .stButton > button {
-        background-color: #e67e22;
-        color: white;
-        font-size: 1.1em;
-        padding: 12px 24px;
-        border-radius: 6px;
-        border: none;
-        font-weight: 600;
-        font-family: 'Roboto', sans-serif !important;
-    }
-    
-    .stButton > button:hover {
-        background-color: #d35400;
-        color: white !important;
-    }
-    
-    /* Info/warning/error boxes */
-    .stAlert {
-        font-size: 1.05em;
-        padding: 15px;
-    }
-    
-    /* Text area and input */
-    .stTextInput > div > div > input,
-    .stTextArea > div > div > textarea {
-        font-size: 1.1em;
-        font-family: 'Roboto', sans-serif !important;
-    }
-    
-    /* Metric styling */
-    .stMetric {
-        background-color: #f5f5f5;
-        padding: 15px;
-        border-radius: 8px;
-        text-align: center;
-    }
-    
-    .stMetric > div:first-child {
-        font-size: 1.3em;
-        color: #333;
-        font-weight: 500;
-    }
-    
-    .stMetric > div:last-child {
-        font-size: 1.8em;
-        color: #e67e22;
-        font-weight: 700;
-    }
-
-    /* Hide the top stripe/header */
-    .stAppHeader {
-        display: none;
-    }
-
-    /* Alternative: hide just the decoration line */
-    header[data-testid="stHeader"] {
-        display: none;
-    }
-
-    /* Remove top padding */
-    .appview-container {
-        padding-top: 0 !important;
-    }
-
-    /* Dark mode adjustments */
-    @media (prefers-color-scheme: dark) {
-        h1 {
-            color: #ffffff !important;
-        }
-        
-        h2 {
-            color: #e8e8e8 !important;
-        }
-        
-        h4 {
-            color: #e8e8e8 !important;
-        }
+# Custom CSS styling (loaded from static/style.css, read once per process)
+@st.cache_resource(show_spinner=False)
+def _load_css() -> str:
+    """Read the app stylesheet once instead of re-embedding it per rerun."""
+    return Path("static/style.css").read_text()
 
-        .stMetric > div:first-child {
-            color: #e8e8e8 !important;
-        }
 
-        .stMetric {
-            background-color: #2b2b2b !important;
-        }
-    }
-    </style>
-""", unsafe_allow_html=True)
+st.markdown(f"<style>{_load_css()}</style>", unsafe_allow_html=True)
 
 # Initialize session state
-if 'pdf_content' not in st.session_state:
-    st.session_state.pdf_content = None
+if 'pdf_key' not in st.session_state:
+    st.session_state.pdf_key = None
 if 'pdf_metadata' not in st.session_state:
     st.session_state.pdf_metadata = None
 if 'questions' not in st.session_state:
     st.session_state.questions = []
 if 'current_question_idx' not in st.session_state:
     st.session_state.current_question_idx = 0
-if 'user_answers' not in st.session_state:
-    st.session_state.user_answers = {}
+# Answer state as parallel per-question columns (indexed by question idx)
+# instead of a dict of per-answer dicts — cheaper to copy on each rerun
+# and the summary counts become straight list scans
+if 'answer_text' not in st.session_state:
+    st.session_state.answer_text = []
+if 'answer_correct' not in st.session_state:
+    st.session_state.answer_correct = []
+if 'answer_feedback' not in st.session_state:
+    st.session_state.answer_feedback = []
 if 'show_feedback' not in st.session_state:
     st.session_state.show_feedback = {}
 if 'api_key' not in st.session_state:
@@ -185,11 +58,63 @@ if 'detected_objectives' not in st.session_state:
     st.session_state.detected_objectives = None
 if 'prefilled_objectives' not in st.session_state:
     st.session_state.prefilled_objectives = ''
+if 'preview_blocks' not in st.session_state:
+    st.session_state.preview_blocks = []
+if 'batch_id' not in st.session_state:
+    st.session_state.batch_id = None
+if 'q_texts' not in st.session_state:
+    st.session_state.q_texts = []
+if 'q_texts_lower' not in st.session_state:
+    st.session_state.q_texts_lower = []
+
+
+@st.cache_resource
+def _pdf_store() -> dict:
+    """
+    Process-global store for parsed page content, keyed by PDF hash.
+
+    Session state is copied on every rerun, so the bulk page text lives
+    here and each session only carries a small hash key. Multiple
+    sessions practicing on the same PDF share one copy.
+    """
+    return {}
+
+
+def _pdf_pages():
+    """Return the current session's page list, or None if nothing is loaded."""
+    key = st.session_state.pdf_key
+    if key is None:
+        return None
+    return _pdf_store().get(key)
+
+
+@st.cache_data(show_spinner=False, max_entries=8, ttl=24 * 60 * 60)
+def _parse_pdf(pdf_bytes: bytes, file_name: str):
+    """
+    Parse a PDF and return (pages_content, total_pages, metadata, objectives).
+
+    Cached on the file bytes, so re-uploading the same document (or any
+    rerun that reaches the parse path) is a cache lookup instead of a
+    full re-parse. parse_pdf extracts text, metadata, and objectives in
+    one document traversal, and the whole result is memoized together.
+    """
+    from utils.pdf_parser import parse_pdf
+
+    parsed = parse_pdf(pdf_bytes, file_name=file_name)
+
+    return parsed.pages, parsed.total_pages, parsed.metadata, parsed.objectives
 
 
 def main():
     """Main application function."""
-    
+    from utils.question_gen import check_api_key
+
+    # Resolve the page count once per run instead of at every render site
+    pages_label = (
+        st.session_state.pdf_metadata.get('pages', 'N/A')
+        if st.session_state.pdf_metadata else None
+    )
+
     st.title("TrustQuiz")
     st.markdown("<p style='font-size: 1.2em; color: #555;'>Generate practice exam questions from your course materials with full source transparency.</p>", unsafe_allow_html=True)
     
@@ -204,17 +129,28 @@ def main():
     with st.sidebar:
         st.header("Settings")
         
-        # API Key input
-        api_key = st.text_input(
-            "OpenAI API Key",
-            value=st.session_state.api_key,
-            type="password",
-            help="Enter your OpenAI API key. Get one at https://platform.openai.com/api-keys"
-        )
-        st.session_state.api_key = api_key
-        
+        # API Key input — inside a form so typing doesn't trigger a rerun per keystroke
+        with st.form("settings", border=False):
+            api_key_input = st.text_input(
+                "OpenAI API Key",
+                value=st.session_state.api_key,
+                type="password",
+                help="Enter your OpenAI API key. Get one at https://platform.openai.com/api-keys"
+            )
+            submitted = st.form_submit_button("Apply")
+
+        if submitted:
+            st.session_state.api_key = api_key_input
+
+        api_key = st.session_state.api_key
+
         if api_key:
-            if check_api_key(api_key):
+            # Only re-validate when the key actually changes, not on every rerun
+            if st.session_state.get('last_validated_key') != api_key:
+                st.session_state.api_key_valid = check_api_key(api_key)
+                st.session_state.last_validated_key = api_key
+
+            if st.session_state.api_key_valid:
                 st.success("✅ API Key valid")
             else:
                 st.error("❌ API Key invalid")
@@ -225,17 +161,17 @@ def main():
         
         
         st.divider()
-        
-        # Stats
-        if st.session_state.pdf_content:
+
+        # Stats (pages_label computed once per run below)
+        if st.session_state.pdf_key:
             st.subheader("Document Info")
             if st.session_state.pdf_metadata:
-                st.write(f"**Pages:** {st.session_state.pdf_metadata.get('pages', 'N/A')}")
+                st.write(f"**Pages:** {pages_label}")
                 st.write(f"**Title:** {st.session_state.pdf_metadata.get('title', 'Unknown')}")
         
         if st.session_state.questions:
             st.subheader("Progress")
-            answered = len(st.session_state.user_answers)
+            answered = sum(a is not None for a in st.session_state.answer_correct)
             total = len(st.session_state.questions)
             st.progress(answered / total if total > 0 else 0)
             st.write(f"{answered}/{total} answered")
@@ -244,16 +180,16 @@ def main():
     tab1, tab2, tab3 = st.tabs(["Upload", "Generate", "Practice"])
     
     with tab1:
-        upload_tab()
-    
+        upload_tab(pages_label)
+
     with tab2:
-        generate_tab(5, None)  # Default values, actual values set in the tab
+        generate_tab(5, None, pages_label)  # Default values, actual values set in the tab
     
     with tab3:
         practice_tab()
 
 
-def upload_tab():
+def upload_tab(pages_label=None):
     st.header("Upload Your Study Material")
     st.write("Upload your lecture slides, notes, or course PDFs to generate personalized practice questions.")
     
@@ -264,28 +200,23 @@ def upload_tab():
     )
     
     if uploaded_file is not None:
-        # Save the file temporarily
-        upload_dir = Path("storage/uploads")
-        upload_dir.mkdir(parents=True, exist_ok=True)
-        
-        file_path = upload_dir / uploaded_file.name
-        
-        with open(file_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-        
+        # The PDF stays in memory for the session — no disk round-trip,
+        # and nothing accumulates in server storage
+        pdf_bytes = uploaded_file.getvalue()
+
         st.success(f"Uploaded: {uploaded_file.name}")
-        
-        # Parse the PDF
+
+        # Parse the PDF (cached on file bytes, so identical uploads are free)
         with st.spinner("Extracting text from PDF..."):
             try:
-                pages_content, total_pages = extract_text_from_pdf(str(file_path))
-                metadata = get_pdf_metadata(str(file_path))
-                
-                st.session_state.pdf_content = pages_content
+                pages_content, total_pages, metadata, detected = _parse_pdf(pdf_bytes, uploaded_file.name)
+
+                # Bulk text goes to the process-global store; the session
+                # keeps only the content hash
+                pdf_key = hashlib.sha256(pdf_bytes).hexdigest()
+                _pdf_store()[pdf_key] = pages_content
+                st.session_state.pdf_key = pdf_key
                 st.session_state.pdf_metadata = metadata
-                
-                # Auto-detect learning objectives
-                detected = extract_learning_objectives(pages_content)
                 st.session_state.detected_objectives = detected
                 
                 st.success(f"Material loaded! Found {total_pages} pages. Ready to generate questions.")
@@ -293,18 +224,24 @@ def upload_tab():
                 if detected:
                     st.success(f"Automatically detected {len(detected)} learning objectives!")
                 
+                # Build the preview strings once; reruns only render the cached list
+                preview_pages = min(3, total_pages)
+                st.session_state.preview_blocks = [
+                    (i, pages_content[i - 1][:500] + ("..." if len(pages_content[i - 1]) > 500 else ""))
+                    for i in range(1, preview_pages + 1)
+                ]
+
                 # Show preview
                 with st.expander("Preview extracted content"):
-                    preview_pages = min(3, total_pages)
-                    for i in range(1, preview_pages + 1):
-                        st.subheader(f"Page {i}")
-                        st.text(pages_content[i][:500] + "..." if len(pages_content[i]) > 500 else pages_content[i])
+                    for page_num, preview in st.session_state.preview_blocks:
+                        st.subheader(f"Page {page_num}")
+                        st.text(preview)
                 
             except Exception as e:
                 st.error(f"Error parsing PDF: {str(e)}")
     
-    elif st.session_state.pdf_content:
-        st.success(f"Document loaded: {st.session_state.pdf_metadata.get('pages', 'N/A')} pages")
+    elif st.session_state.pdf_key:
+        st.success(f"Document loaded: {pages_label} pages")
         
         # Add button to proceed
         st.markdown("---")
@@ -315,11 +252,11 @@ def upload_tab():
                 st.rerun()
 
 
-def generate_tab(num_questions, topic_filter):
+def generate_tab(num_questions, topic_filter, pages_label=None):
     """Generate exam questions from uploaded content."""
     st.header("Start Practice Session")
     
-    if not st.session_state.pdf_content:
+    if not st.session_state.pdf_key:
         st.warning("Please upload a PDF file first in the Upload tab.")
         return
     
@@ -336,7 +273,7 @@ def generate_tab(num_questions, topic_filter):
         help="Select the number of practice questions to generate"
     )
     
-    if not st.session_state.pdf_content:
+    if not st.session_state.pdf_key:
         st.warning("Please upload a PDF file first in the Upload tab.")
         return
     
@@ -372,15 +309,30 @@ def generate_tab(num_questions, topic_filter):
     )
     
     st.divider()
-    
+
+    generate_in_background = st.checkbox(
+        "Generate in background (50% cheaper, can take up to 24h)",
+        value=False,
+        help="Routes generation through the OpenAI Batch API. Good for pregenerating question banks, not for practicing right now."
+    )
+
     col1, col2 = st.columns([3, 1])
-    
+
     with col1:
-        st.info(f"Document ready: {st.session_state.pdf_metadata.get('pages', 'N/A')} pages")
-    
+        st.info(f"Document ready: {pages_label} pages")
+
     with col2:
         if st.button("Start Practice", type="primary", use_container_width=True):
-            generate_questions_action(num_questions, topic_filter if topic_filter else None, learning_objectives)
+            if generate_in_background:
+                submit_batch_action(num_questions, topic_filter if topic_filter else None, learning_objectives)
+            else:
+                generate_questions_action(num_questions, topic_filter if topic_filter else None, learning_objectives)
+
+    # Pending background batch, if any
+    if st.session_state.batch_id:
+        st.info(f"Background generation pending (batch `{st.session_state.batch_id}`).")
+        if st.button("Check batch status"):
+            check_batch_action()
     
     # Show existing questions if any
     if st.session_state.questions:
@@ -393,43 +345,132 @@ def generate_tab(num_questions, topic_filter):
                 st.divider()
 
 
+def _load_questions(questions):
+    """Store a fresh question set and reset the practice state."""
+    for q in questions:
+        # Stable short id for widget keys — Python's hash() is randomized
+        # per process and would remount widgets after every restart
+        q['_key'] = hashlib.blake2b(q['question'].encode('utf-8'), digest_size=6).hexdigest()
+
+    st.session_state.questions = questions
+    st.session_state.q_texts = [q['question'] for q in questions]
+    st.session_state.q_texts_lower = [q['question'].lower() for q in questions]
+    st.session_state.current_question_idx = 0
+    st.session_state.answer_text = [None] * len(questions)
+    st.session_state.answer_correct = [None] * len(questions)
+    st.session_state.answer_feedback = [None] * len(questions)
+    st.session_state.show_feedback = {}
+
+
 def generate_questions_action(num_questions, topic_filter, learning_objectives=None):
     """Action to generate questions using the LLM."""
-    with st.spinner("Generating questions... This may take 15-30 seconds..."):
-        try:
-            # Store learning objectives in session state for later reference
-            if learning_objectives:
-                st.session_state.learning_objectives = learning_objectives
-            
-            questions = generate_questions(
-                pages_content=st.session_state.pdf_content,
-                api_key=st.session_state.api_key,
-                num_questions=num_questions,
-                topic=topic_filter if topic_filter else None,
-                learning_objectives=learning_objectives if learning_objectives else None,
-                temperature=0.3
-            )
-            
-            st.session_state.questions = questions
-            st.session_state.current_question_idx = 0
-            st.session_state.user_answers = {}
-            st.session_state.show_feedback = {}
-            
+    from utils.question_gen import generate_questions
+
+    # Streamed progress replaces the silent 15-30s spinner
+    status = st.empty()
+    status.info(f"Generating questions... 0/{num_questions}")
+    progress = {'done': 0, 'tail': ''}
+
+    def _on_progress(delta):
+        # Each question object in the JSON stream contributes one
+        # "question" key; counting them gives a live i/N readout. The
+        # 9-char tail catches keys split across deltas without recounting.
+        chunk = progress['tail'] + delta
+        progress['done'] += chunk.count('"question"')
+        progress['tail'] = chunk[-9:]
+        status.info(f"Generating questions... {min(progress['done'], num_questions)}/{num_questions}")
+
+    try:
+        # Store learning objectives in session state for later reference
+        if learning_objectives:
+            st.session_state.learning_objectives = learning_objectives
+
+        questions = generate_questions(
+            pages_content=_pdf_pages(),
+            api_key=st.session_state.api_key,
+            num_questions=num_questions,
+            topic=topic_filter if topic_filter else None,
+            learning_objectives=learning_objectives if learning_objectives else None,
+            temperature=0.3,
+            progress_callback=_on_progress
+        )
+
+        status.empty()
+
+        _load_questions(questions)
+
+        st.success(f"Your practice session is ready! {len(questions)} questions generated!")
+        st.toast("Questions generated!", icon="🎉")
+
+    except Exception as e:
+        status.empty()
+        st.error(f"Error generating questions: {str(e)}")
+
+
+def submit_batch_action(num_questions, topic_filter, learning_objectives=None):
+    """Submit question generation through the OpenAI Batch API."""
+    from utils.question_gen import submit_batch_generation
+
+    try:
+        if learning_objectives:
+            st.session_state.learning_objectives = learning_objectives
+
+        batch_id = submit_batch_generation(
+            pages_content=_pdf_pages(),
+            api_key=st.session_state.api_key,
+            num_questions=num_questions,
+            topic=topic_filter if topic_filter else None,
+            learning_objectives=learning_objectives if learning_objectives else None,
+            temperature=0.3
+        )
+        st.session_state.batch_id = batch_id
+        st.success("Background generation submitted! Use 'Check batch status' to collect the questions.")
+    except Exception as e:
+        st.error(f"Error submitting batch: {str(e)}")
+
+
+def check_batch_action():
+    """Poll the pending batch and load questions once it completes."""
+    from utils.question_gen import fetch_batch_result
+
+    try:
+        status, questions = fetch_batch_result(st.session_state.batch_id, st.session_state.api_key)
+
+        if status == "completed" and questions:
+            _load_questions(questions)
+            st.session_state.batch_id = None
             st.success(f"Your practice session is ready! {len(questions)} questions generated!")
-            st.balloons()
-            
-        except Exception as e:
-            st.error(f"Error generating questions: {str(e)}")
+        elif status == "completed":
+            # Completed but empty — polling again will never help
+            st.session_state.batch_id = None
+            st.error("The batch completed but returned no questions. Please submit a new generation.")
+        else:
+            st.info(f"Batch status: {status}. Check again later.")
+    except Exception as e:
+        st.error(f"Error checking batch: {str(e)}")
 
 
 def practice_tab():
     """Practice with generated questions."""
     st.header("Check Your Knowledge")
-    
+
     if not st.session_state.questions:
         st.warning("Please generate questions first in the Generate tab.")
         return
-    
+
+    _question_view()
+
+
+@st.fragment
+def _question_view():
+    """
+    Question navigation, answering, and feedback.
+
+    Runs as a fragment: buttons in here rerun only this block instead of
+    re-executing the sidebar and all three tabs.
+    """
+    from utils.question_gen import grade_answer
+
     questions = st.session_state.questions
     total_questions = len(questions)
     
@@ -439,7 +480,7 @@ def practice_tab():
     with col1:
         if st.button("Previous") and st.session_state.current_question_idx > 0:
             st.session_state.current_question_idx -= 1
-            st.rerun()
+            st.rerun(scope="fragment")
     
     with col2:
         st.markdown(f"<h4 style='text-align: center;'>Question {st.session_state.current_question_idx + 1} of {total_questions}</h4>", unsafe_allow_html=True)
@@ -447,7 +488,7 @@ def practice_tab():
     with col3:
         if st.button("Next") and st.session_state.current_question_idx < total_questions - 1:
             st.session_state.current_question_idx += 1
-            st.rerun()
+            st.rerun(scope="fragment")
     
     st.divider()
     
@@ -478,26 +519,24 @@ def practice_tab():
                     api_key=st.session_state.api_key
                 )
                 
-                st.session_state.user_answers[q_id] = {
-                    'answer': user_answer,
-                    'is_correct': result['is_correct'],
-                    'feedback': result['feedback']
-                }
+                st.session_state.answer_text[q_id] = user_answer
+                st.session_state.answer_correct[q_id] = result['is_correct']
+                st.session_state.answer_feedback[q_id] = result['feedback']
                 st.session_state.show_feedback[q_id] = True
-                st.rerun()
+                st.rerun(scope="fragment")
     
     with col2:
         if st.button("Show Source"):
             show_source_modal(current_q)
     
     # Show feedback if answer has been checked
-    if q_id in st.session_state.show_feedback and st.session_state.show_feedback[q_id]:
-        result = st.session_state.user_answers[q_id]
-        
-        if result['is_correct']:
-            st.success(f"{result['feedback']}")
+    if st.session_state.show_feedback.get(q_id):
+        feedback = st.session_state.answer_feedback[q_id]
+
+        if st.session_state.answer_correct[q_id]:
+            st.success(f"{feedback}")
         else:
-            st.error(f"{result['feedback']}")
+            st.error(f"{feedback}")
     
     # Progress summary at bottom
     st.divider()
@@ -536,27 +575,31 @@ def show_source_modal(question):
             st.markdown("**Source Excerpt:**")
             st.info(question['source_excerpt'])
     
-    # Show full page content
-    if st.session_state.pdf_content and question['source_page'] in st.session_state.pdf_content:
+    # Show full page content (source_page is 1-based, the list is 0-based)
+    pages_content = _pdf_pages()
+    if pages_content and 1 <= question['source_page'] <= len(pages_content):
         with st.expander("View full page content"):
-            page_text = st.session_state.pdf_content[question['source_page']]
+            page_text = pages_content[question['source_page'] - 1]
             st.text_area(
                 f"Page {question['source_page']} content:",
                 value=page_text,
                 height=300,
                 disabled=True,
-                key=f"source_page_{question['source_page']}_{hash(question['question'])}"  # Unique key!
+                key=f"source_page_{question['source_page']}_{question['_key']}"  # Unique, stable key!
             )
 
 
 def display_summary():
     """Display summary of answers with performance analysis."""
-    if not st.session_state.user_answers:
+    from utils.analytics import display_performance_summary, get_study_recommendation, calculate_performance_stats
+
+    answer_correct = st.session_state.answer_correct
+    answered = sum(a is not None for a in answer_correct)
+    if not answered:
         return
-    
+
     total = len(st.session_state.questions)
-    answered = len(st.session_state.user_answers)
-    correct = sum(1 for ans in st.session_state.user_answers.values() if ans['is_correct'])
+    correct = sum(1 for a in answer_correct if a)
     
     col1, col2, col3 = st.columns(3)
     
@@ -574,14 +617,19 @@ def display_summary():
     if answered == total:
         st.markdown("---")
         
-        # Build results list for analytics
-        results = []
-        for q_id, answer_data in st.session_state.user_answers.items():
-            question = st.session_state.questions[q_id]
-            results.append({
-                'question': question['question'],
-                'is_correct': answer_data['is_correct']
-            })
+        # Build results list for analytics from the question-text column
+        # (avoids pulling the full question dicts just to read one field)
+        q_texts = st.session_state.q_texts
+        q_texts_lower = st.session_state.q_texts_lower
+        results = [
+            {
+                'question': q_texts[q_id],
+                '_question_lower': q_texts_lower[q_id],
+                'is_correct': is_correct
+            }
+            for q_id, is_correct in enumerate(answer_correct)
+            if is_correct is not None
+        ]
         
         # Display performance summary
         display_performance_summary(results)
@@ -599,7 +647,9 @@ def display_summary():
             if st.button("Generate More Questions", use_container_width=True):
                 # Reset for new practice session
                 st.session_state.questions = []
-                st.session_state.user_answers = {}
+                st.session_state.answer_text = []
+                st.session_state.answer_correct = []
+                st.session_state.answer_feedback = []
                 st.session_state.show_feedback = {}
                 st.session_state.current_question_idx = 0
                 st.rerun()
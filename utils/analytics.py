@@ -3,17 +3,62 @@ Analytics and progress tracking for student performance.
 """
 
 from typing import List, Dict
-from collections import Counter
+from bisect import bisect_right
+from collections import defaultdict
 import streamlit as st
 
+# Keyword -> topic lookup for the performance breakdown, ordered with the
+# most specific keywords first and scanned with early exit. (An
+# Aho-Corasick automaton would be the next rung if this grew to hundreds
+# of keywords; at this size a tuple scan is faster and dependency-free.)
+_TOPIC_KEYWORDS = (
+    ('chain-of-thought', 'Chain-of-Thought Prompting'),
+    ('cot', 'Chain-of-Thought Prompting'),
+    ('compress', 'COMPRESS Strategy'),
+    ('write', 'WRITE Strategy'),
+    ('select', 'SELECT Strategy'),
+)
+_DEFAULT_TOPIC = 'General Concepts'
 
+# Score bands as sorted thresholds indexed with bisect — one table lookup
+# replaces the if/elif ladder, and both the summary badge and the study
+# recommendation share the same pattern
+_BADGE_THRESHOLDS = (60, 80)
+_SCORE_BADGES = (
+    ("🔴", "Keep studying - you'll get there! 📚"),
+    ("🟡", "Good progress! Keep practicing. 💪"),
+    ("🟢", "Excellent work! You're well-prepared! 🎉"),
+)
+
+_RECOMMENDATION_THRESHOLDS = (60, 70, 80, 90)
+_RECOMMENDATIONS = (
+    "Don't worry! Break down topics into smaller chunks and practice consistently.",
+    "Keep going! Create more practice questions and review the course material thoroughly.",
+    "Good foundation. Focus on practicing weak areas and reviewing source material.",
+    "Almost there! Review your weak areas and you'll be fully prepared.",
+    "You're exam-ready! Consider helping classmates or exploring advanced topics.",
+)
+
+
+def _classify_topic(question_text_lower: str) -> str:
+    """Map a lowercased question text to its topic bucket."""
+    for keyword, topic in _TOPIC_KEYWORDS:
+        if keyword in question_text_lower:
+            return topic
+    return _DEFAULT_TOPIC
+
+
+@st.cache_data(show_spinner=False)
 def calculate_performance_stats(results: List[Dict]) -> Dict:
     """
     Calculate performance statistics from quiz results.
-    
+
+    Cached so the summary rerendering on every rerun doesn't recompute
+    stats until the user answers another question.
+
     Args:
         results: List of result dictionaries with question data and correctness
-    
+
     Returns:
         Dictionary with performance metrics
     """
@@ -31,49 +76,39 @@ def calculate_performance_stats(results: List[Dict]) -> Dict:
     percentage = (correct / total) * 100
     
     # Track topics (based on question content - simple heuristic)
-    # In a real implementation, you'd track this more systematically
-    topic_performance = {}
-    
+    # In a real implementation, you'd track this more systematically.
+    # Buckets are [correct, total] lists — one accumulation pass with
+    # index access instead of nested dict lookups.
+    buckets = defaultdict(lambda: [0, 0])
+
     for result in results:
-        question_text = result.get('question', '')
-        # Simple topic extraction (you can improve this)
-        if 'chain-of-thought' in question_text.lower() or 'cot' in question_text.lower():
-            topic = 'Chain-of-Thought Prompting'
-        elif 'compress' in question_text.lower():
-            topic = 'COMPRESS Strategy'
-        elif 'write' in question_text.lower():
-            topic = 'WRITE Strategy'
-        elif 'select' in question_text.lower():
-            topic = 'SELECT Strategy'
-        else:
-            topic = 'General Concepts'
-        
-        if topic not in topic_performance:
-            topic_performance[topic] = {'correct': 0, 'total': 0}
-        
-        topic_performance[topic]['total'] += 1
+        # Use the lowercased text cached at generation time when present
+        text_lower = result.get('_question_lower') or result.get('question', '').lower()
+        bucket = buckets[_classify_topic(text_lower)]
+
+        bucket[1] += 1
         if result.get('is_correct', False):
-            topic_performance[topic]['correct'] += 1
-    
+            bucket[0] += 1
+
     # Identify weak and strong areas
     weak_areas = []
     strong_areas = []
-    
-    for topic, stats in topic_performance.items():
-        accuracy = stats['correct'] / stats['total'] if stats['total'] > 0 else 0
+
+    for topic, (topic_correct, topic_total) in buckets.items():
+        accuracy = topic_correct / topic_total if topic_total > 0 else 0
         if accuracy < 0.6:  # Less than 60% correct
             weak_areas.append({
                 'topic': topic,
                 'accuracy': accuracy,
-                'correct': stats['correct'],
-                'total': stats['total']
+                'correct': topic_correct,
+                'total': topic_total
             })
         elif accuracy >= 0.8:  # 80% or more correct
             strong_areas.append({
                 'topic': topic,
                 'accuracy': accuracy,
-                'correct': stats['correct'],
-                'total': stats['total']
+                'correct': topic_correct,
+                'total': topic_total
             })
     
     return {
@@ -99,15 +134,7 @@ def display_performance_summary(results: List[Dict]):
     
     # Overall score with color coding
     percentage = stats['percentage']
-    if percentage >= 80:
-        score_color = "🟢"
-        message = "Excellent work! You're well-prepared! 🎉"
-    elif percentage >= 60:
-        score_color = "🟡"
-        message = "Good progress! Keep practicing. 💪"
-    else:
-        score_color = "🔴"
-        message = "Keep studying - you'll get there! 📚"
+    score_color, message = _SCORE_BADGES[bisect_right(_BADGE_THRESHOLDS, percentage)]
     
     # Display score
     col1, col2, col3 = st.columns(3)
@@ -142,23 +169,15 @@ def display_performance_summary(results: List[Dict]):
         st.info("💡 **Tip**: Generate more questions focusing on your weak areas to improve your understanding!")
 
 
+@st.cache_data(show_spinner=False)
 def get_study_recommendation(percentage: float) -> str:
     """
     Get a personalized study recommendation based on performance.
-    
+
     Args:
         percentage: Performance percentage (0-100)
     
     Returns:
         Recommendation text
     """
-    if percentage >= 90:
-        return "You're exam-ready! Consider helping classmates or exploring advanced topics."
-    elif percentage >= 80:
-        return "Almost there! Review your weak areas and you'll be fully prepared."
-    elif percentage >= 70:
-        return "Good foundation. Focus on practicing weak areas and reviewing source material."
-    elif percentage >= 60:
-        return "Keep going! Create more practice questions and review the course material thoroughly."
-    else:
-        return "Don't worry! Break down topics into smaller chunks and practice consistently."
\ No newline at end of file
+    return _RECOMMENDATIONS[bisect_right(_RECOMMENDATION_THRESHOLDS, percentage)]
\ No newline at end of file
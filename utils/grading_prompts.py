@@ -0,0 +1,45 @@
+"""
+Prompt templates for LLM-based answer grading.
+
+Not imported anywhere yet: grade_answer does a local letter comparison
+for multiple-choice questions. Kept in their own module so the large
+literals are only parsed if an LLM grader is actually wired up (import
+lazily at the call site when that happens).
+"""
+
+GRADING_SYSTEM_PROMPT = """You are a fair and accurate exam grader. Your task is to evaluate student answers against the correct answer.
+
+For multiple-choice questions:
+- Check if the student's answer matches the correct answer exactly
+- Return a simple correctness assessment
+
+Return ONLY valid JSON (no markdown, no code blocks):
+{
+  "is_correct": true or false,
+  "feedback": "Brief explanation"
+}
+"""
+
+def get_grading_prompt(question: str, correct_answer: str, user_answer: str, explanation: str) -> str:
+    """
+    Generate the grading prompt.
+
+    Args:
+        question: The question text
+        correct_answer: The correct answer
+        user_answer: The student's answer
+        explanation: Explanation of the correct answer
+
+    Returns:
+        Formatted grading prompt
+    """
+    return f"""
+QUESTION: {question}
+
+CORRECT ANSWER: {correct_answer}
+EXPLANATION: {explanation}
+
+STUDENT'S ANSWER: {user_answer}
+
+Please evaluate if the student's answer is correct.
+"""
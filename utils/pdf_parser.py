@@ -4,53 +4,209 @@ Extracts text content page by page from PDF files.
 """
 
 import fitz  # PyMuPDF
-from typing import Dict, Tuple, List
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Tuple, List, Union
 import os
 import re
 
+# A PDF can be given as a filesystem path or as in-memory bytes
+PdfSource = Union[str, bytes, bytearray, memoryview]
 
-def extract_text_from_pdf(pdf_path: str) -> Tuple[Dict[int, str], int]:
+# Plain-text extraction flags: expand ligatures and rejoin hyphenated line
+# breaks in PyMuPDF's C layer, so clean_text has less left to normalize
+_TEXT_FLAGS = fitz.TEXT_DEHYPHENATE | fitz.TEXT_MEDIABOX_CLIP
+
+# Learning-objective patterns are compiled once at import time so per-PDF
+# calls skip pattern compilation and cache lookups entirely.
+
+# Markers of a learning-objectives section (German and English), fused
+# into one alternation so the engine walks the text once instead of once
+# per pattern; most common markers first, all groups non-capturing
+_SECTION_UNION = re.compile(
+    r'(?:learning objectives?)'
+    r'|(?:lernziele?)'
+    r'|(?:learning outcomes?)'
+    r'|(?:main learning (?:outcomes?|objectives?))'
+    r'|(?:nach diesem (?:kapitel|modul|kurs))'
+    r'|(?:after this (?:chapter|module|course))'
+    r'|(?:by the end of this)'
+    r'|(?:students? (?:will|can|should))'
+    r'|(?:you (?:will|can|should))'
+    r'|(?:sie können)',
+    re.IGNORECASE
+)
+
+# Bullet points, numbered items, and action-verb lines that look like
+# objectives — one alternation scanned in a single pass, with named
+# groups so the matched text can be pulled out via match.lastgroup
+_OBJECTIVE_UNION = re.compile(
+    r'(?:^|\n)[\s]*(?:'
+    r'[•\-\*●◦]\s*(?P<bullet>.+?)'  # Bullet points
+    r'|\d+[\.\)]\s*(?P<numbered>.+?)'  # Numbered lists
+    r'|(?P<phrase>(?:'  # "You can...", "Sie können...", action verbs
+    r'You (?:can|will|should)|Sie können|Students? (?:will|can|should)'
+    r'|Define|Explain|Understand|Describe|Identify|Recognize|Apply|Summarize'
+    r') .+?)'
+    r')(?:\n|$)',
+    re.IGNORECASE | re.MULTILINE
+)
+
+# Common lead-ins stripped from matched objectives
+_PREFIX_STRIP = re.compile(r'^(You can|Sie können|Students? (?:will|can|should))\s+', re.IGNORECASE)
+
+# Whitespace normalization for clean_text: runs of non-newline whitespace,
+# and newline runs together with their surrounding spaces (blank lines)
+_WS_RUN = re.compile(r'[ \t\r\f\v]+')
+_NL_RUN = re.compile(r' *(?:\n *)+')
+
+# Learning objectives sit near the top of the first pages, so detection
+# only needs the leading text blocks of those pages, capped overall —
+# a fraction of the regex work of scanning full page texts
+_LO_PAGES = 3
+_LO_BLOCKS_PER_PAGE = 3
+_LO_HINT_CHARS = 5000
+
+
+def _open_document(pdf_source: PdfSource) -> fitz.Document:
     """
-    Extract text from a PDF file, page by page.
-    
+    Open a PDF from a filesystem path or an in-memory bytes buffer.
+
     Args:
-        pdf_path: Path to the PDF file
-    
+        pdf_source: Path to the PDF file, or the raw PDF bytes
+
     Returns:
-        Tuple of (dictionary mapping page numbers to text content, total pages)
-        Page numbers start at 1 (not 0) for user-friendliness
-    
+        An open fitz.Document (caller is responsible for closing it)
+
+    Raises:
+        FileNotFoundError: If a path is given and the file doesn't exist
+    """
+    if isinstance(pdf_source, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=pdf_source, filetype="pdf")
+
+    if not os.path.exists(pdf_source):
+        raise FileNotFoundError(f"PDF file not found: {pdf_source}")
+
+    return fitz.open(pdf_source)
+
+
+def _extract_pages(doc: fitz.Document) -> List[str]:
+    """
+    Extract and clean the text of every page of an open document.
+
+    Page.get_text releases the GIL in PyMuPDF's C layer, so pages are
+    processed in a thread pool for multi-page documents; executor.map
+    preserves page order. Concurrent reads on separate pages of one
+    document are safe in PyMuPDF.
+
+    Args:
+        doc: Open fitz.Document
+
+    Returns:
+        List of cleaned page texts in page order
+    """
+    def _page_text(page_num: int) -> str:
+        return clean_text(doc[page_num].get_text("text", flags=_TEXT_FLAGS))
+
+    total_pages = len(doc)
+    if total_pages <= 1:
+        return [_page_text(i) for i in range(total_pages)]
+
+    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as executor:
+        return list(executor.map(_page_text, range(total_pages)))
+
+
+@lru_cache(maxsize=8)
+def _extract_text_cached(path: str, size: int, mtime_ns: int) -> Tuple[str, ...]:
+    """
+    Parse and cache the page texts of a PDF on disk.
+
+    Keyed on (path, size, mtime) so the memo invalidates itself whenever
+    the file changes; pages are stored as a tuple so cache hits can't be
+    mutated by callers.
+    """
+    doc = fitz.open(path)
+    try:
+        return tuple(_extract_pages(doc))
+    finally:
+        doc.close()
+
+
+def _lo_hint_pages(doc: fitz.Document) -> List[str]:
+    """
+    Collect top-of-page text from the first pages for objective detection.
+
+    Takes the first few text blocks of each of the leading pages (where
+    learning-objective sections live) instead of their full text, capped
+    at _LO_HINT_CHARS in total.
+
+    Args:
+        doc: Open fitz.Document
+
+    Returns:
+        List of per-page hint texts, in page order
+    """
+    hints = []
+    budget = _LO_HINT_CHARS
+    for page_num in range(min(_LO_PAGES, len(doc))):
+        blocks = doc[page_num].get_text("blocks")[:_LO_BLOCKS_PER_PAGE]
+        # block[4] is the text, block[6] the type (0 = text, 1 = image)
+        text = clean_text("\n".join(b[4] for b in blocks if b[6] == 0))[:budget]
+        hints.append(text)
+        budget -= len(text)
+        if budget <= 0:
+            break
+    return hints
+
+
+def extract_text_from_pdf(pdf_source: PdfSource) -> Tuple[List[str], int]:
+    """
+    Extract text from a PDF, page by page.
+
+    Path sources are memoized on (path, size, mtime), so repeated calls
+    on an unchanged file — e.g. rerun-triggered re-parses — skip the
+    PyMuPDF work entirely.
+
+    Args:
+        pdf_source: Path to the PDF file, or the raw PDF bytes
+
+    Returns:
+        Tuple of (list of page texts where pages_content[n - 1] is page n,
+        total pages). A list serializes/copies cheaper through Streamlit
+        session state than a dict keyed by page number.
+
     Raises:
         FileNotFoundError: If PDF file doesn't exist
         Exception: If PDF cannot be opened or parsed
     """
-    if not os.path.exists(pdf_path):
-        raise FileNotFoundError(f"PDF file not found: {pdf_path}")
-    
-    pages_content = {}
-    
+    if isinstance(pdf_source, str):
+        if not os.path.exists(pdf_source):
+            raise FileNotFoundError(f"PDF file not found: {pdf_source}")
+        try:
+            stat = os.stat(pdf_source)
+            pages = _extract_text_cached(pdf_source, stat.st_size, stat.st_mtime_ns)
+        except Exception as e:
+            raise Exception(f"Error parsing PDF: {str(e)}")
+        # Copy out of the memo so callers can't mutate the cached pages
+        return list(pages), len(pages)
+
+    try:
+        # Open the PDF (no disk round-trip for in-memory uploads)
+        doc = _open_document(pdf_source)
+    except Exception as e:
+        raise Exception(f"Error parsing PDF: {str(e)}")
+
     try:
-        # Open the PDF
-        doc = fitz.open(pdf_path)
-        
-        # Extract text from each page
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            text = page.get_text()
-            
-            # Clean up the text (remove excessive whitespace)
-            text = clean_text(text)
-            
-            # Store with 1-based page numbering
-            pages_content[page_num + 1] = text
-        
+        pages_content = _extract_pages(doc)
         total_pages = len(doc)
-        doc.close()
-        
+
         return pages_content, total_pages
-    
+
     except Exception as e:
         raise Exception(f"Error parsing PDF: {str(e)}")
+    finally:
+        doc.close()
 
 
 def clean_text(text: str) -> str:
@@ -64,142 +220,196 @@ def clean_text(text: str) -> str:
     Returns:
         Cleaned text
     """
-    # Split into lines first
-    lines = text.split('\n')
-    
-    # Clean each line individually (remove excessive spaces)
-    cleaned_lines = []
-    for line in lines:
-        line = ' '.join(line.split())  # Remove multiple spaces within line
-        if line:  # Keep non-empty lines
-            cleaned_lines.append(line)
-    
-    # Rejoin with newlines preserved
-    text = '\n'.join(cleaned_lines)
-    
-    return text
+    # Collapse runs of spaces/tabs, then drop blank lines and the spaces
+    # around line breaks — two C-level regex passes instead of a Python
+    # split/join pipeline with per-line allocations
+    text = _WS_RUN.sub(' ', text)
+    text = _NL_RUN.sub('\n', text)
+
+    return text.strip()
+
+
+@dataclass
+class ParsedPdf:
+    """Everything extracted from a PDF in one traversal."""
+    pages: List[str]
+    total_pages: int
+    metadata: dict
+    objectives: List[str]
+
+
+def parse_pdf(pdf_source: PdfSource, file_name: str = None) -> ParsedPdf:
+    """
+    Extract page text, metadata, and learning objectives in a single pass.
+
+    The PDF is opened exactly once and traversed once, so the
+    open/xref-parse cost isn't paid separately for text extraction,
+    metadata, and objective detection.
+
+    Args:
+        pdf_source: Path to the PDF file, or the raw PDF bytes
+        file_name: Original file name (used for the title when passing bytes)
+
+    Returns:
+        ParsedPdf with pages (pages[n - 1] is page n), total_pages,
+        metadata (see get_pdf_metadata), and detected objectives
+
+    Raises:
+        FileNotFoundError: If PDF file doesn't exist
+        Exception: If PDF cannot be opened or parsed
+    """
+    try:
+        doc = _open_document(pdf_source)
+    except FileNotFoundError:
+        raise
+    except Exception as e:
+        raise Exception(f"Error parsing PDF: {str(e)}")
 
+    try:
+        pages_content = _extract_pages(doc)
+        total_pages = len(doc)
+        metadata = _build_metadata(doc, pdf_source, file_name)
+        objectives = extract_learning_objectives(_lo_hint_pages(doc))
+
+        return ParsedPdf(pages_content, total_pages, metadata, objectives)
 
-def get_pdf_metadata(pdf_path: str) -> dict:
+    except Exception as e:
+        raise Exception(f"Error parsing PDF: {str(e)}")
+    finally:
+        doc.close()
+
+
+def _build_metadata(doc: fitz.Document, pdf_source: PdfSource, file_name: str = None) -> dict:
+    """
+    Build the metadata dictionary from an already-open document.
+
+    Args:
+        doc: Open fitz.Document
+        pdf_source: Path or bytes the document was opened from
+        file_name: Original file name (used for the title when passing bytes)
+
+    Returns:
+        Dictionary containing PDF metadata
+    """
+    # Always use filename as title (more reliable than PDF metadata)
+    if isinstance(pdf_source, (bytes, bytearray, memoryview)):
+        filename = file_name or 'Unknown'
+        file_size = len(pdf_source)
+    else:
+        filename = os.path.basename(pdf_source)
+        file_size = os.path.getsize(pdf_source)
+    title = os.path.splitext(filename)[0]
+
+    return {
+        'title': title,
+        'author': doc.metadata.get('author', 'Unknown'),
+        'subject': doc.metadata.get('subject', ''),
+        'pages': len(doc),
+        'file_size': file_size
+    }
+
+
+def get_pdf_metadata(pdf_source: PdfSource, file_name: str = None, doc: fitz.Document = None) -> dict:
     """
     Extract metadata from PDF file.
-    
+
     Args:
-        pdf_path: Path to the PDF file
-    
+        pdf_source: Path to the PDF file, or the raw PDF bytes
+        file_name: Original file name (required for the title when passing bytes)
+        doc: Optional already-open fitz.Document; when given, the open
+            (and its xref parse) is skipped and the caller keeps ownership
+
     Returns:
         Dictionary containing PDF metadata
     """
     try:
-        doc = fitz.open(pdf_path)
-        
-        # Always use filename as title (more reliable than PDF metadata)
-        filename = os.path.basename(pdf_path)
-        title = os.path.splitext(filename)[0]
-        
-        metadata = {
-            'title': title,
-            'author': doc.metadata.get('author', 'Unknown'),
-            'subject': doc.metadata.get('subject', ''),
-            'pages': len(doc),
-            'file_size': os.path.getsize(pdf_path)
-        }
-        doc.close()
+        owned = doc is None
+        if owned:
+            doc = _open_document(pdf_source)
+        metadata = _build_metadata(doc, pdf_source, file_name)
+        if owned:
+            doc.close()
         return metadata
     except Exception as e:
         return {'error': str(e)}
 
 
-def extract_page_text(pdf_path: str, page_number: int) -> str:
+def extract_page_text(pdf_source: PdfSource, page_number: int, doc: fitz.Document = None) -> str:
     """
     Extract text from a specific page.
-    
+
     Args:
-        pdf_path: Path to the PDF file
+        pdf_source: Path to the PDF file, or the raw PDF bytes
         page_number: Page number (1-based indexing)
-    
+        doc: Optional already-open fitz.Document; when given, the open
+            (and its xref parse) is skipped and the caller keeps ownership
+
     Returns:
         Text content of the page
     """
     try:
-        doc = fitz.open(pdf_path)
-        
+        owned = doc is None
+        if owned:
+            doc = _open_document(pdf_source)
+
         # Convert to 0-based indexing
         page = doc[page_number - 1]
-        text = page.get_text()
+        text = page.get_text("text", flags=_TEXT_FLAGS)
         text = clean_text(text)
-        
-        doc.close()
+
+        if owned:
+            doc.close()
         return text
     except Exception as e:
         return f"Error extracting page {page_number}: {str(e)}"
 
 
-def extract_learning_objectives(pages_content: Dict[int, str]) -> List[str]:
+def extract_learning_objectives(pages_content: List[str]) -> List[str]:
     """
     Extract learning objectives from the first few pages of course material.
-    
+
+    Works on full page texts, but callers should prefer the lo_hint from
+    parse_pdf (top-of-page blocks only) to keep the regex work small.
+
     Args:
-        pages_content: Dictionary mapping page numbers to text content
-    
+        pages_content: List of page texts (pages_content[n - 1] is page n)
+
     Returns:
         List of detected learning objective strings
     """
-    objectives = []
-    
-    # Define patterns to detect learning objectives sections (German and English)
-    # Define patterns to detect learning objectives sections (German and English)
-    section_patterns = [
-        r'lernziele?',
-        r'learning objectives?',
-        r'learning outcomes?',
-        r'nach diesem (kapitel|modul|kurs)',
-        r'after this (chapter|module|course)',
-        r'by the end of this',
-        r'students? (will|can|should)',
-        r'you (will|can|should)',
-        r'sie können',
-        r'main learning (outcomes?|objectives?)',
+    # Look at first 3 pages (objectives usually at beginning), keeping
+    # only those that announce a learning-objectives section. The union
+    # is compiled with IGNORECASE, so no lowercased copy of the page is
+    # allocated just for this check.
+    section_pages = [
+        text for text in pages_content[:3]
+        if _SECTION_UNION.search(text)
     ]
-    
-    # Look at first 3 pages (objectives usually at beginning)
-    pages_to_check = sorted([p for p in pages_content.keys() if p <= 3])
-    
-    for page_num in pages_to_check:
-        text = pages_content[page_num]
-        text_lower = text.lower()
-        
-        # Check if this page contains a learning objectives section
-        section_found = any(re.search(pattern, text_lower) for pattern in section_patterns)
-        
-        if section_found:
-            # Extract bullet points or numbered items that look like learning objectives
-            # Match lines that start with bullet, number, or "You can/Sie können"
-            objective_patterns = [
-                r'(?:^|\n)[\s]*[•\-\*●◦]\s*(.+?)(?:\n|$)',  # Bullet points
-                r'(?:^|\n)[\s]*\d+[\.\)]\s*(.+?)(?:\n|$)',  # Numbered lists
-                r'(?:^|\n)[\s]*(You (?:can|will|should) .+?)(?:\n|$)',  # "You can..."
-                r'(?:^|\n)[\s]*(Sie können .+?)(?:\n|$)',  # "Sie können..."
-                r'(?:^|\n)[\s]*(Students? (?:will|can|should) .+?)(?:\n|$)',  # "Students will..."
-                r'(?:^|\n)[\s]*(Define .+?)(?:\n|$)',  # Action verbs
-                r'(?:^|\n)[\s]*(Explain .+?)(?:\n|$)',
-                r'(?:^|\n)[\s]*(Understand .+?)(?:\n|$)',
-                r'(?:^|\n)[\s]*(Describe .+?)(?:\n|$)',
-                r'(?:^|\n)[\s]*(Identify .+?)(?:\n|$)',
-                r'(?:^|\n)[\s]*(Recognize .+?)(?:\n|$)',
-                r'(?:^|\n)[\s]*(Apply .+?)(?:\n|$)',
-                r'(?:^|\n)[\s]*(Summarize .+?)(?:\n|$)',
-            ]
-            
-            for pattern in objective_patterns:
-                matches = re.finditer(pattern, text, re.IGNORECASE | re.MULTILINE)
-                for match in matches:
-                    obj = match.group(1).strip()
-                    # Filter: must be substantial (10-300 chars) and not too generic
-                    if 10 <= len(obj) <= 300 and obj not in objectives:
-                        # Clean up: remove common prefixes
-                        obj = re.sub(r'^(You can|Sie können|Students? (?:will|can|should))\s+', '', obj, flags=re.IGNORECASE)
-                        objectives.append(obj)
-    
-    # Return up to 5 unique objectives
-    return objectives[:5]
\ No newline at end of file
+
+    if not section_pages:
+        return []
+
+    # One finditer pass over the joined text, collecting matches in
+    # document order; the \x1e sentinel line keeps matches from spanning
+    # page boundaries
+    joined = '\n\x1e\n'.join(section_pages)
+
+    # Unique objectives in match order; the set makes the duplicate
+    # check O(1) instead of scanning the growing list
+    seen = set()
+    objectives = []
+
+    # Extract bullet points or numbered items that look like learning objectives
+    for match in _OBJECTIVE_UNION.finditer(joined):
+        obj = match.group(match.lastgroup).strip()
+        # Filter: must be substantial (10-300 chars) and not too generic
+        if 10 <= len(obj) <= 300 and obj not in seen:
+            seen.add(obj)
+            # Clean up: remove common prefixes
+            obj = _PREFIX_STRIP.sub('', obj)
+            objectives.append(obj)
+            # 5 objectives is the cap — stop scanning once it's reached
+            if len(objectives) == 5:
+                break
+
+    return objectives
\ No newline at end of file
@@ -1,7 +1,13 @@
 """
-Prompt templates for question generation and grading.
+Prompt templates for question generation.
+
+Grading prompts live in grading_prompts.py; multiple-choice grading is
+currently a local string compare, so they aren't imported anywhere and
+their large literals stay off the cold-import path.
 """
 
+from string import Template
+
 SYSTEM_PROMPT = """You are a university exam question generator. Your task is to create high-quality exam questions based ONLY on the provided course material.
 
 CRITICAL RULES:
@@ -65,12 +71,12 @@ Return ONLY valid JSON with this exact structure (no markdown, no code blocks):
 }
 """
 
-def get_question_generation_prompt(pages_content: dict, num_questions: int = 5, topic: str = None, learning_objectives: str = None) -> str:
+def get_question_generation_prompt(pages_content: list, num_questions: int = 5, topic: str = None, learning_objectives: str = None) -> str:
     """
     Generate the user prompt for question generation.
-    
+
     Args:
-        pages_content: Dictionary mapping page numbers to text content
+        pages_content: List of page texts (pages_content[n - 1] is page n)
         num_questions: Number of questions to generate
         topic: Optional topic filter
         learning_objectives: Optional learning objectives to address
@@ -78,20 +84,44 @@ def get_question_generation_prompt(pages_content: dict, num_questions: int = 5,
     Returns:
         Formatted prompt string
     """
-    # Build the course material section
-    material_text = "COURSE MATERIAL:\n\n"
-    for page_num, content in pages_content.items():
-        material_text += f"=== PAGE {page_num} ===\n{content}\n\n"
+    # Build the course material section with a list + join — linear in
+    # total size, where += reallocated the accumulated prompt per page
+    # Blank pages (empty extractions, or pages cut by the prompt budget)
+    # are skipped while numbering stays aligned to the original document
+    parts = ["COURSE MATERIAL:\n\n"]
+    parts.extend(
+        f"=== PAGE {page_num} ===\n{content}\n\n"
+        for page_num, content in enumerate(pages_content, start=1)
+        if content
+    )
+    material_text = "".join(parts)
     
     # Build the request section
     topic_instruction = f" focusing on the topic: {topic}" if topic else ""
     
-    # Add learning objectives if provided
+    # Add learning objectives if provided — only the objectives text
+    # varies, so the constant skeleton around it is built once at import
+    # instead of re-interpolating the multi-KB template per call
     objectives_instruction = ""
     if learning_objectives and learning_objectives.strip():
-        objectives_instruction = f"""
+        objectives_instruction = "".join(
+            (_OBJECTIVES_PREFIX, learning_objectives, _OBJECTIVES_SUFFIX)
+        )
+
+    request_text = _REQUEST_TEMPLATE.substitute(
+        num_questions=num_questions,
+        topic_instruction=topic_instruction,
+        objectives_instruction=objectives_instruction,
+    )
+
+    return "".join((material_text, request_text))
+
+
+_OBJECTIVES_PREFIX = """
 LEARNING OBJECTIVES COVERED IN THIS COURSE:
-{learning_objectives}
+"""
+
+_OBJECTIVES_SUFFIX = """
 
 ⚠️ CRITICAL INSTRUCTION - READ CAREFULLY:
 The questions MUST test whether students can APPLY and DEMONSTRATE these competencies through:
@@ -142,11 +172,11 @@ QUESTION STYLE GUIDELINES:
 
 The questions should feel like they're testing whether someone could actually USE this knowledge in practice, not just whether they read the material.
 """
-    
-    request_text = f"""
+
+_REQUEST_TEMPLATE = Template("""
 TASK:
-Generate exactly {num_questions} multiple-choice exam questions{topic_instruction}.
-{objectives_instruction}
+Generate exactly $num_questions multiple-choice exam questions$topic_instruction.
+$objectives_instruction
 
 Requirements for each question:
 - 4 options (A, B, C, D)
@@ -164,44 +194,4 @@ Requirements for each question:
 - Ensure distractors (wrong answers) are plausible but clearly incorrect
 
 Return the questions in the JSON format specified in your system instructions.
-"""
-    
-    return material_text + request_text
-
-
-GRADING_SYSTEM_PROMPT = """You are a fair and accurate exam grader. Your task is to evaluate student answers against the correct answer.
-
-For multiple-choice questions:
-- Check if the student's answer matches the correct answer exactly
-- Return a simple correctness assessment
-
-Return ONLY valid JSON (no markdown, no code blocks):
-{
-  "is_correct": true or false,
-  "feedback": "Brief explanation"
-}
-"""
-
-def get_grading_prompt(question: str, correct_answer: str, user_answer: str, explanation: str) -> str:
-    """
-    Generate the grading prompt.
-    
-    Args:
-        question: The question text
-        correct_answer: The correct answer
-        user_answer: The student's answer
-        explanation: Explanation of the correct answer
-    
-    Returns:
-        Formatted grading prompt
-    """
-    return f"""
-QUESTION: {question}
-
-CORRECT ANSWER: {correct_answer}
-EXPLANATION: {explanation}
-
-STUDENT'S ANSWER: {user_answer}
-
-Please evaluate if the student's answer is correct.
-"""
\ No newline at end of file
+""")
\ No newline at end of file
@@ -3,37 +3,195 @@ Question generation using OpenAI's API.
 Handles LLM calls for generating exam questions and grading answers.
 """
 
+import httpx
 import openai
+import hashlib
 import json
-from typing import List, Dict, Optional
-from .prompts import (
-    SYSTEM_PROMPT, 
-    get_question_generation_prompt,
-    GRADING_SYSTEM_PROMPT,
-    get_grading_prompt
-)
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+from .prompts import SYSTEM_PROMPT, get_question_generation_prompt
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_loads(text):
+    """
+    Parse JSON with orjson when available (C-speed parsing for the
+    multi-KB LLM responses), falling back to the stdlib. orjson's
+    JSONDecodeError subclasses json.JSONDecodeError, so error handling
+    is shared.
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+# Completed generations are cached on disk so identical requests (same
+# material, parameters, and seed) skip the paid API call entirely —
+# mostly a win during development reruns and repeated sessions.
+_LLM_CACHE_DIR = Path("storage/llm_cache")
+
+
+def _llm_cache_get(key: str) -> Optional[List[Dict]]:
+    """Return cached questions for this key, or None on a miss."""
+    try:
+        with open(_LLM_CACHE_DIR / f"{key}.json", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _llm_cache_put(key: str, questions: List[Dict]) -> None:
+    """Store questions under this key; cache failures are non-fatal."""
+    try:
+        _LLM_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(_LLM_CACHE_DIR / f"{key}.json", "w", encoding="utf-8") as f:
+            json.dump(questions, f)
+    except OSError:
+        pass
+
+
+# Leading bullets/numbering stripped when canonicalizing objectives
+_LIST_MARKER = re.compile(r'^(?:[•\-\*●◦]|\d+[\.\)])\s*')
+
+
+def _normalize_objectives(learning_objectives: Optional[str]) -> str:
+    """
+    Canonicalize a learning-objectives block for cache keying.
+
+    Strips bullets/numbering and surrounding whitespace, lowercases, and
+    sorts the lines, so reordered or reformatted but otherwise identical
+    objective lists map to the same cached question set instead of
+    re-paying the full generation cost.
+    """
+    if not learning_objectives:
+        return ""
+
+    lines = []
+    for line in learning_objectives.splitlines():
+        line = _LIST_MARKER.sub('', line.strip()).strip()
+        if line:
+            lines.append(line.lower())
+
+    return "\n".join(sorted(lines))
+
+
+# Prompt-size budgeting: token counts are estimated at ~4 chars/token,
+# and the material injected into one request is capped well under the
+# model's context window — input tokens dominate generation cost
+_CHARS_PER_TOKEN = 4
+_MATERIAL_TOKEN_BUDGET = 80_000
+
+_WORD = re.compile(r'\w+')
+
+
+def _select_relevant_pages(
+    pages_content: List[str],
+    topic: Optional[str] = None,
+    learning_objectives: Optional[str] = None,
+    max_tokens: int = _MATERIAL_TOKEN_BUDGET
+) -> List[str]:
+    """
+    Trim the course material to the prompt budget, keeping relevant pages.
+
+    Under budget, the pages pass through untouched. Over budget, pages
+    are ranked by term overlap with the topic/objectives query (length-
+    normalized term frequency), or front-to-back when there is nothing
+    to rank by, and the lowest-value pages are blanked rather than
+    dropped so page numbering — and the model's source_page citations —
+    stay intact. The prompt builder skips blank pages.
+
+    Args:
+        pages_content: List of page texts (pages_content[n - 1] is page n)
+        topic: Optional topic filter to rank against
+        learning_objectives: Optional objectives text to rank against
+        max_tokens: Approximate budget for the injected material
+
+    Returns:
+        pages_content, or a copy with the cut pages replaced by ''
+    """
+    max_chars = max_tokens * _CHARS_PER_TOKEN
+    if sum(len(page) for page in pages_content) <= max_chars:
+        return pages_content
+
+    query_terms = frozenset(
+        _WORD.findall(f"{topic or ''} {learning_objectives or ''}".lower())
+    )
+
+    def _score(idx: int) -> float:
+        if not query_terms:
+            # No query: prefer earlier pages
+            return -idx
+        words = _WORD.findall(pages_content[idx].lower())
+        if not words:
+            return 0.0
+        return sum(1 for w in words if w in query_terms) / len(words)
+
+    ranked = sorted(range(len(pages_content)), key=_score, reverse=True)
+
+    kept = set()
+    budget = max_chars
+    for idx in ranked:
+        cost = len(pages_content[idx])
+        if cost <= budget:
+            kept.add(idx)
+            budget -= cost
+
+    return [page if idx in kept else '' for idx, page in enumerate(pages_content)]
+
+
+@lru_cache(maxsize=4)
+def _get_client(api_key: str) -> openai.OpenAI:
+    """
+    Return a cached OpenAI client for this API key.
+
+    Building a client sets up a fresh HTTP connection pool; caching it
+    reuses the pool across calls and reruns, and the explicit keepalive
+    limit holds warm TLS connections open between requests. lru_cache
+    (rather than st.cache_resource) keeps this module usable outside a
+    Streamlit run.
+    """
+    return openai.OpenAI(
+        api_key=api_key,
+        http_client=httpx.Client(
+            limits=httpx.Limits(max_keepalive_connections=8)
+        )
+    )
 
 
 def generate_questions(
-    pages_content: Dict[int, str],
+    pages_content: List[str],
     api_key: str,
     num_questions: int = 5,
     topic: Optional[str] = None,
     learning_objectives: Optional[str] = None,
     model: str = "gpt-4o",
-    temperature: float = 0.3
+    temperature: float = 0.3,
+    seed: int = 42,
+    progress_callback=None
 ) -> List[Dict]:
     """
     Generate exam questions from course material using OpenAI's API.
-    
+
     Args:
-        pages_content: Dictionary mapping page numbers to text content
+        pages_content: List of page texts (pages_content[n - 1] is page n)
         api_key: OpenAI API key
         num_questions: Number of questions to generate
         topic: Optional topic filter
         learning_objectives: Optional learning objectives to address
         model: OpenAI model to use
         temperature: Temperature for generation (0.0-1.0, lower = more focused)
+        seed: Sampling seed passed to the API; pinning it makes identical
+            requests reproducible and therefore disk-cacheable
+        progress_callback: Optional callable receiving each streamed text
+            delta; when given, the response is streamed so the UI can show
+            progress instead of blocking silently
     
     Returns:
         List of question dictionaries with structure:
@@ -49,49 +207,206 @@ def generate_questions(
     Raises:
         Exception: If API call fails or response is invalid
     """
-    # Initialize OpenAI client
-    client = openai.OpenAI(api_key=api_key)
-    
+    # Reuse the cached OpenAI client
+    client = _get_client(api_key)
+
+    # Keep the injected material inside the prompt budget
+    pages_content = _select_relevant_pages(pages_content, topic, learning_objectives)
+
     # Generate the prompt
     user_prompt = get_question_generation_prompt(pages_content, num_questions, topic, learning_objectives)
-    
+
+    # Equivalent request? Serve it from the disk cache, no API call.
+    # Objectives are canonicalized so trivial reformatting/reordering of
+    # the LO list still hits the cached set.
+    pages_digest = hashlib.sha256("\n\x1e\n".join(pages_content).encode("utf-8")).hexdigest()
+    cache_key = hashlib.sha256(
+        f"{model}|{temperature}|{seed}|{num_questions}|{topic or ''}|"
+        f"{_normalize_objectives(learning_objectives)}|{pages_digest}".encode("utf-8")
+    ).hexdigest()
+    cached = _llm_cache_get(cache_key)
+    if cached is not None:
+        return cached
+
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt}
+    ]
+
     try:
-        # Call OpenAI API
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=temperature,
-            response_format={"type": "json_object"}  # Ensure JSON response
-        )
-        
+        if progress_callback is None:
+            # Call OpenAI API
+            response = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                seed=seed,
+                response_format={"type": "json_object"}  # Ensure JSON response
+            )
+            response_text = response.choices[0].message.content
+        else:
+            # Stream the response and report each delta so the caller can
+            # render progress while tokens arrive
+            stream = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                seed=seed,
+                response_format={"type": "json_object"},
+                stream=True
+            )
+            parts = []
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    progress_callback(delta)
+            response_text = "".join(parts)
+
         # Parse the response
-        response_text = response.choices[0].message.content
-        questions_data = json.loads(response_text)
+        questions_data = _json_loads(response_text)
         
         # Validate the response structure
         if "questions" not in questions_data:
             raise ValueError("Response missing 'questions' field")
         
         questions = questions_data["questions"]
-        
-        # Validate each question has required fields
-        required_fields = ["question", "options", "correct_answer", "explanation", "source_page"]
-        for q in questions:
-            for field in required_fields:
-                if field not in q:
-                    raise ValueError(f"Question missing required field: {field}")
-        
+
+        _validate_questions(questions)
+
+        _llm_cache_put(cache_key, questions)
+
         return questions
-    
+
     except json.JSONDecodeError as e:
         raise Exception(f"Failed to parse LLM response as JSON: {str(e)}")
     except Exception as e:
         raise Exception(f"Error generating questions: {str(e)}")
 
 
+# Fields every generated question must carry
+_REQUIRED_FIELDS = frozenset({"question", "options", "correct_answer", "explanation", "source_page"})
+
+
+def _validate_questions(questions: List[Dict]) -> None:
+    """
+    Validate that each question has the required fields.
+
+    One set difference per question against the frozenset instead of
+    five Python-level membership checks each.
+
+    Args:
+        questions: List of question dictionaries from the LLM
+
+    Raises:
+        ValueError: If a question is missing a required field
+    """
+    for q in questions:
+        missing = _REQUIRED_FIELDS - q.keys()
+        if missing:
+            raise ValueError(f"Question missing required field(s): {', '.join(sorted(missing))}")
+
+
+def submit_batch_generation(
+    pages_content: List[str],
+    api_key: str,
+    num_questions: int = 5,
+    topic: Optional[str] = None,
+    learning_objectives: Optional[str] = None,
+    model: str = "gpt-4o",
+    temperature: float = 0.3
+) -> str:
+    """
+    Submit question generation through the OpenAI Batch API.
+
+    Batch requests cost 50% of the synchronous price and complete within
+    24 hours — suited for pregenerating question banks, not for the
+    interactive flow.
+
+    Args:
+        Same as generate_questions.
+
+    Returns:
+        The batch id to poll with fetch_batch_result
+
+    Raises:
+        Exception: If the batch submission fails
+    """
+    client = _get_client(api_key)
+
+    # Keep the injected material inside the prompt budget
+    pages_content = _select_relevant_pages(pages_content, topic, learning_objectives)
+
+    user_prompt = get_question_generation_prompt(pages_content, num_questions, topic, learning_objectives)
+
+    request = {
+        "custom_id": "question-generation",
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt}
+            ],
+            "temperature": temperature,
+            "response_format": {"type": "json_object"}
+        }
+    }
+
+    try:
+        batch_file = client.files.create(
+            file=("questions.jsonl", json.dumps(request).encode("utf-8")),
+            purpose="batch"
+        )
+        batch = client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        return batch.id
+    except Exception as e:
+        raise Exception(f"Error submitting batch: {str(e)}")
+
+
+def fetch_batch_result(batch_id: str, api_key: str) -> Tuple[str, Optional[List[Dict]]]:
+    """
+    Poll a background generation batch and fetch questions when done.
+
+    Args:
+        batch_id: Batch id returned by submit_batch_generation
+        api_key: OpenAI API key
+
+    Returns:
+        Tuple of (batch status, questions list or None if not completed)
+
+    Raises:
+        Exception: If polling or parsing the batch output fails
+    """
+    client = _get_client(api_key)
+
+    try:
+        batch = client.batches.retrieve(batch_id)
+        if batch.status != "completed":
+            return batch.status, None
+
+        output = client.files.content(batch.output_file_id).text
+
+        questions = []
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            item = _json_loads(line)
+            content = item["response"]["body"]["choices"][0]["message"]["content"]
+            questions.extend(_json_loads(content).get("questions", []))
+
+        _validate_questions(questions)
+
+        return "completed", questions
+    except Exception as e:
+        raise Exception(f"Error fetching batch result: {str(e)}")
+
+
 def grade_answer(
     question: str,
     correct_answer: str,
@@ -136,20 +451,25 @@ def grade_answer(
     }
 
 
+@lru_cache(maxsize=16)
 def check_api_key(api_key: str) -> bool:
     """
     Verify that the OpenAI API key is valid.
-    
+
+    Retrieves a single model — an O(1) response — instead of paging the
+    full model list just to probe credentials. Memoized per key so
+    repeat validations during a session are free.
+
     Args:
         api_key: OpenAI API key to check
-    
+
     Returns:
         True if valid, False otherwise
     """
     try:
-        client = openai.OpenAI(api_key=api_key)
-        # Try a minimal API call
-        client.models.list()
+        client = _get_client(api_key)
+        # Minimal liveness probe: one small object vs. the full list
+        client.models.retrieve("gpt-4o-mini")
         return True
     except Exception:
         return False
\ No newline at end of file